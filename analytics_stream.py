@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Incremental analytics with Server-Sent Events fan-out
+Aggregates are updated once per prediction and pushed to every subscriber
+"""
+import asyncio
+import json
+import threading
+from collections import deque
+
+
+def format_event(event, data):
+    """Serialize one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class AnalyticsStream:
+    """Running prediction aggregates plus a set of SSE subscriber queues"""
+
+    def __init__(self, recent_limit=10, queue_size=100):
+        self.recent_limit = recent_limit
+        self.queue_size = queue_size
+        self.lock = threading.Lock()
+        self.subscribers = {}
+        self.reset()
+
+    def reset(self):
+        """Zero the aggregates without notifying subscribers"""
+        with self.lock:
+            self.total_predictions = 0
+            self.spam_count = 0
+            self.confidence_sum = 0.0
+            self.text_length_sum = 0
+            self.word_count_sum = 0
+            self.recent = deque(maxlen=self.recent_limit)
+
+    def _counters(self):
+        total = self.total_predictions
+        return {
+            "total_predictions": total,
+            "spam_count": self.spam_count,
+            "ham_count": total - self.spam_count,
+            "spam_percentage": (self.spam_count / total * 100) if total > 0 else 0,
+            "average_confidence": (self.confidence_sum / total) if total > 0 else 0,
+            "average_text_length": (self.text_length_sum / total) if total > 0 else 0,
+            "average_word_count": (self.word_count_sum / total) if total > 0 else 0,
+        }
+
+    def summary(self):
+        """Return the same shape as GET /analytics without scanning the history"""
+        with self.lock:
+            summary = self._counters()
+            summary["recent_predictions"] = list(self.recent)
+        return summary
+
+    def record(self, predictions):
+        """Fold new predictions into the aggregates and broadcast one delta event"""
+        with self.lock:
+            for p in predictions:
+                self.total_predictions += 1
+                self.spam_count += 1 if p["prediction"] == 1 else 0
+                self.confidence_sum += p["confidence"]
+                self.text_length_sum += p["text_length"]
+                self.word_count_sum += p["word_count"]
+                self.recent.append(p)
+            payload = format_event("prediction", {
+                "predictions": predictions,
+                "analytics": self._counters(),
+            })
+            self._broadcast(payload)
+
+    def clear(self):
+        """Reset the aggregates and tell subscribers the history was cleared"""
+        self.reset()
+        with self.lock:
+            self._broadcast(format_event("cleared", {"analytics": self._counters()}))
+
+    def subscribe(self):
+        """Register a subscriber; returns its queue and an initial snapshot event"""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self.lock:
+            self.subscribers[queue] = loop
+            analytics = self._counters()
+            analytics["recent_predictions"] = list(self.recent)
+            snapshot = format_event("snapshot", {
+                "analytics": analytics,
+                "history": list(self.recent),
+            })
+        return queue, snapshot
+
+    def unsubscribe(self, queue):
+        with self.lock:
+            self.subscribers.pop(queue, None)
+
+    def _broadcast(self, payload):
+        # Called with the lock held; predictions run in worker threads, so hand
+        # the already-serialized payload to each subscriber's event loop
+        for queue, loop in list(self.subscribers.items()):
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, payload)
+            except RuntimeError:
+                # Event loop already closed
+                self.subscribers.pop(queue, None)
+
+    @staticmethod
+    def _offer(queue, payload):
+        # Every event carries absolute counters, so a slow client that misses
+        # an older event still converges on the next one
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(payload)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark full-text vs windowed scoring for texts from 100 B to 10 MB
+Reports median latency and peak traced memory per text size
+"""
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+
+import joblib
+
+from fast_vectorizer import FastCountVectorizer
+from scoring import TextScorer, score_text
+
+SIZES = [100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+
+WORDS = (
+    "urgent free money click here now claim prize limited offer discount winner "
+    "meeting report project deadline coffee weekend thanks presentation schedule "
+    "the a to of and in for on with please attached regards team tomorrow"
+).split()
+
+
+def make_text(size, seed=0):
+    """ASCII text of exactly `size` bytes built from spam and ham vocabulary"""
+    rng = random.Random(seed)
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:size]
+
+
+def measure(fn, text, repeats):
+    """Median wall time in ms and peak traced memory in bytes for fn(text)"""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(text)
+        times.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    fn(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(times), peak
+
+
+def format_size(n):
+    if n < 1000:
+        return f"{n:.0f} B"
+    for unit in ("KB", "MB"):
+        n /= 1000
+        if n < 1000:
+            return f"{n:.1f} {unit}"
+    return f"{n / 1000:.1f} GB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--max-size", type=int, default=SIZES[-1])
+    args = parser.parse_args()
+
+    vectorizer = FastCountVectorizer(joblib.load("count_vectorizer.pkl"))
+    model = joblib.load("logistic_regression_model.pkl")
+    scorer = TextScorer(vectorizer, model)
+
+    print(f"{'size':>8} | {'full ms':>9} {'full peak':>10} | {'windowed ms':>11} {'windowed peak':>13} | agree")
+    print("-" * 72)
+    for size in SIZES:
+        if size > args.max_size:
+            break
+        text = make_text(size)
+        # Large inputs are slow on the full path; fewer repeats keep the run short
+        repeats = args.repeats if size <= 1_000_000 else 1
+        full_ms, full_peak = measure(lambda t: score_text(vectorizer, model, t), text, repeats)
+        windowed_ms, windowed_peak = measure(scorer.score, text, repeats)
+        agree = score_text(vectorizer, model, text)[0] == scorer.score(text)[0]
+        print(f"{format_size(size):>8} | {full_ms:>9.2f} {format_size(full_peak):>10} | "
+              f"{windowed_ms:>11.2f} {format_size(windowed_peak):>13} | {'yes' if agree else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import './App.css';
 
 function App() {
@@ -13,6 +13,7 @@ function App() {
   const [darkMode, setDarkMode] = useState(false);
   const [activeTab, setActiveTab] = useState('single');
   const [connectionStatus, setConnectionStatus] = useState('checking');
+  const streamConnected = useRef(false);
   
   // API base URL - update this to your Render URL
   const API_BASE = 'https://spamdetectionapp-1.onrender.com';
@@ -21,6 +22,49 @@ function App() {
     checkServerConnection();
   }, []);
 
+  // Live analytics: the server pushes a snapshot on connect, then one delta per prediction
+  useEffect(() => {
+    if (connectionStatus !== 'connected' || typeof EventSource === 'undefined') {
+      return undefined;
+    }
+
+    const source = new EventSource(`${API_BASE}/stream`);
+
+    source.onopen = () => {
+      streamConnected.current = true;
+    };
+
+    source.onerror = () => {
+      // EventSource reconnects on its own; poll after predictions until it does
+      streamConnected.current = false;
+    };
+
+    source.addEventListener('snapshot', (event) => {
+      const data = JSON.parse(event.data);
+      setHistory(data.history);
+      setAnalytics(data.analytics);
+    });
+
+    source.addEventListener('prediction', (event) => {
+      const data = JSON.parse(event.data);
+      setHistory(prev => [...prev, ...data.predictions].slice(-10));
+      setAnalytics(prev => ({
+        ...data.analytics,
+        recent_predictions: [...((prev && prev.recent_predictions) || []), ...data.predictions].slice(-10),
+      }));
+    });
+
+    source.addEventListener('cleared', () => {
+      setHistory([]);
+      setAnalytics(null);
+    });
+
+    return () => {
+      streamConnected.current = false;
+      source.close();
+    };
+  }, [connectionStatus]);
+
   const checkServerConnection = async () => {
     try {
       setConnectionStatus('checking');
@@ -133,8 +177,10 @@ function App() {
 
       const data = await response.json();
       setPrediction(data);
-      fetchHistory();
-      fetchAnalytics();
+      if (!streamConnected.current) {
+        fetchHistory();
+        fetchAnalytics();
+      }
     } catch (err) {
       console.error('Prediction error:', err);
       setError(`Error: ${err.message}. Please check your connection and try again.`);
@@ -171,8 +217,10 @@ function App() {
 
       const data = await response.json();
       setBatchResults(data);
-      fetchHistory();
-      fetchAnalytics();
+      if (!streamConnected.current) {
+        fetchHistory();
+        fetchAnalytics();
+      }
     } catch (err) {
       setError('Error: Could not connect to the spam detection API.');
     } finally {
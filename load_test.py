@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Load test: /predict latency for interactive clients while a bulk client is active
+Shows the effect of per-client rate limiting and fair queuing in main.py
+"""
+import argparse
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+
+def post(url, payload, api_key):
+    """POST JSON and return (status, seconds)"""
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json", "X-API-Key": api_key},
+    )
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, time.perf_counter() - start
+
+
+def interactive_client(base_url, client_id, rps, stop, latencies):
+    """Send single short messages at a steady rate"""
+    interval = 1.0 / rps
+    while not stop.is_set():
+        status, elapsed = post(f"{base_url}/predict", {"text": "Are we still on for lunch?"},
+                               f"interactive-{client_id}")
+        if status == 200:
+            latencies.append(elapsed * 1000)
+        time.sleep(max(0.0, interval - elapsed))
+
+
+def bulk_client(base_url, client_id, batch_size, stop, counts):
+    """Post full batches back to back, backing off briefly when throttled or queued out"""
+    batch = {"texts": ["URGENT! You have won $1000000! Click here now to claim your prize!"] * batch_size}
+    while not stop.is_set():
+        status, _ = post(f"{base_url}/predict-batch", batch, f"bulk-{client_id}")
+        counts[status] = counts.get(status, 0) + 1
+        if status in (429, 503):
+            time.sleep(0.5)
+
+
+def run_phase(base_url, seconds, interactive_clients, rps, bulk_clients, batch_size):
+    stop = threading.Event()
+    latencies = []
+    bulk_counts = {}
+    threads = [
+        threading.Thread(target=interactive_client, args=(base_url, i, rps, stop, latencies))
+        for i in range(interactive_clients)
+    ] + [
+        threading.Thread(target=bulk_client, args=(base_url, i, batch_size, stop, bulk_counts))
+        for i in range(bulk_clients)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return latencies, bulk_counts
+
+
+def report(name, latencies, bulk_counts):
+    print(f"\n{name}")
+    print("-" * 40)
+    if latencies:
+        print(f"  /predict requests: {len(latencies)}")
+        for p in (50, 95, 99):
+            print(f"  p{p}: {np.percentile(latencies, p):.1f} ms")
+        print(f"  max: {max(latencies):.1f} ms")
+    if bulk_counts:
+        print(f"  bulk responses by status: {bulk_counts}")
+
+
+def client_keys(interactive_clients, bulk_clients):
+    """API keys used by the test clients; the server must list them in API_KEYS"""
+    return ([f"interactive-{i}" for i in range(interactive_clients)]
+            + [f"bulk-{i}" for i in range(bulk_clients)])
+
+
+def start_local_server(port, api_keys):
+    """Run main:app in a background thread for a self-contained test"""
+    # Unknown keys share the caller's IP bucket, so allowlist each client before main reads the env
+    os.environ.setdefault("API_KEYS", ",".join(api_keys))
+    # Let bulk clients through the rate limiter so the fair scheduler is what's under load
+    os.environ.setdefault("RATE_LIMIT_RPS", "1000")
+    import uvicorn
+    import main
+
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.1)
+    return f"http://127.0.0.1:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", help="Server to test (default: start main:app locally); "
+                                      "its API_KEYS must include the keys printed at startup")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--interactive-clients", type=int, default=4)
+    parser.add_argument("--rps", type=float, default=5, help="Requests per second per interactive client")
+    parser.add_argument("--bulk-clients", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    api_keys = client_keys(args.interactive_clients, args.bulk_clients)
+    base_url = args.url or start_local_server(args.port, api_keys)
+    print(f"🎯 Load testing {base_url}")
+    print(f"   client keys: {','.join(api_keys)}")
+
+    baseline = run_phase(base_url, args.seconds, args.interactive_clients, args.rps, 0, args.batch_size)
+    report("Interactive only", *baseline)
+
+    contended = run_phase(base_url, args.seconds, args.interactive_clients, args.rps,
+                          args.bulk_clients, args.batch_size)
+    report(f"Interactive with {args.bulk_clients} bulk client(s)", *contended)
+
+    with urllib.request.urlopen(f"{base_url}/rate-limits") as response:
+        stats = json.loads(response.read())
+    print("\nThrottling and scheduler stats")
+    print("-" * 40)
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
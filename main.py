@@ -1,15 +1,36 @@
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import hmac
+import math
 import joblib
 import os
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
 from typing import List
 import datetime
-import numpy as np
+from fast_vectorizer import FastCountVectorizer
+from shadow_model import load_shadow_from_env
+from scoring import text_scorer_from_env
+from analytics_stream import AnalyticsStream
+from rate_limiter import PayloadLimitMiddleware, QueueFull, load_limits_from_env
+from memory_diagnostics import load_memory_diagnostics_from_env
 
 app = FastAPI(title="Spam Detection API", version="2.0.0", description="Enhanced Spam Detection with Analytics")
 
+# Per-client rate limits and fair scheduling between /predict and /predict-batch
+rate_limiter, scheduler = load_limits_from_env()
+BATCH_CHUNK_SIZE = int(os.environ.get("BATCH_CHUNK_SIZE", "10"))
+
+# Reject oversized bodies, including chunked ones, before they are fully read
+app.add_middleware(PayloadLimitMiddleware, limiter=rate_limiter)
+
+@app.exception_handler(QueueFull)
+async def queue_full_handler(request: Request, exc: QueueFull):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -42,9 +63,70 @@ except Exception as e:
 except Exception as e:
     print(f"Error loading models: {e}")
 
+# Swap in the faster transform; produces the same features as the fitted vectorizer
+vectorizer = FastCountVectorizer(vectorizer)
+
+# Bounded-cost scoring: texts over LONG_TEXT_MAX_CHARS are scored in sampled windows
+scorer = text_scorer_from_env(vectorizer, model)
+HISTORY_TEXT_CHARS = int(os.environ.get("HISTORY_TEXT_CHARS", "1000"))
+RESPONSE_TEXT_CHARS = int(os.environ.get("RESPONSE_TEXT_CHARS", "1000"))
+
+# Optional shadow model scored on sampled traffic (set SHADOW_VECTORIZER and SHADOW_MODEL)
+shadow = load_shadow_from_env()
+
+def enforce_rate_limit(request: Request, cost: int = 1):
+    """Charge the caller `cost` tokens or raise 429; returns the client key for refunds"""
+    key = rate_limiter.client_key(request)
+    retry_after = rate_limiter.acquire(key, cost)
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+    return key
+
+def preview_text(text, limit):
+    """First `limit` characters of a text, marked with … when cut"""
+    return text if len(text) <= limit else text[:limit] + "…"
+
+def history_entry(result_data):
+    """Copy a result for history, keeping only a preview of very long texts"""
+    entry = result_data.copy()
+    entry["text"] = preview_text(entry["text"], HISTORY_TEXT_CHARS)
+    return entry
+
 # In-memory storage for analytics (in production, use a database)
 prediction_history = []
 
+# Running aggregates pushed to dashboards over /stream
+analytics_stream = AnalyticsStream()
+
+# Opt-in memory diagnostics (MEMORY_DIAGNOSTICS=1); nothing is installed when disabled
+memory = load_memory_diagnostics_from_env(gauges={
+    "prediction_history": lambda: len(prediction_history),
+    "stream_subscribers": lambda: len(analytics_stream.subscribers),
+})
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+if memory is not None:
+    @app.middleware("http")
+    async def track_allocations(request: Request, call_next):
+        # tracemalloc counts are process-wide: overlapping requests add to (and
+        # reset) each other's peak, so per-request figures are only exact when serial
+        before = memory.begin_request()
+        response = await call_next(request)
+        # Key by route template so arbitrary URLs can't add counters
+        route = request.scope.get("route")
+        endpoint = f"{request.method} {route.path}" if route is not None else "unmatched"
+        memory.end_request(endpoint, before)
+        return response
+
+def score_with_stats(text):
+    """Score one text and count its words; runs in the threadpool"""
+    prediction_num, confidence = scorer.score(text)
+    return prediction_num, confidence, scorer.count_words(text)
+
 class InputData(BaseModel):
     text: str
 
@@ -69,40 +151,42 @@ def health_check():
     return {"status": "healthy", "timestamp": datetime.datetime.now().isoformat()}
 
 @app.post("/predict", response_model=PredictionResponse)
-def predict(data: InputData):
+async def predict(data: InputData, request: Request):
+    client = enforce_rate_limit(request)
     try:
-        # Transform the input text using the vectorizer
-        X = vectorizer.transform([data.text])
-        prediction = model.predict(X)
-        probabilities = model.predict_proba(X)[0]
-        confidence = float(probabilities.max())
-        
-        # Handle both string and numeric predictions
-        if isinstance(prediction[0], str):
-            result = prediction[0]
-            prediction_num = 1 if result == "spam" else 0
-        else:
-            prediction_num = int(prediction[0])
-            result = "spam" if prediction_num == 1 else "ham"
+        # Wait for a slot on the event loop, then run inference in the threadpool
+        async with scheduler.slot("interactive"):
+            # Vectorize and score; long texts are scored in bounded windows
+            prediction_num, confidence, word_count = await run_in_threadpool(score_with_stats, data.text)
+        result = "spam" if prediction_num == 1 else "ham"
         
         # Additional text analytics
         text_length = len(data.text)
-        word_count = len(data.text.split())
         
         response = {
             "prediction": prediction_num,
             "result": result,
             "confidence": confidence,
-            "text": data.text,
+            # Echo a preview only; text_length still reports the full size
+            "text": preview_text(data.text, RESPONSE_TEXT_CHARS),
             "timestamp": datetime.datetime.now().isoformat(),
             "text_length": text_length,
             "word_count": word_count
         }
         
         # Store in history
-        prediction_history.append(response.copy())
+        entry = history_entry(response)
+        prediction_history.append(entry)
+        analytics_stream.record([entry])
+        
+        if shadow is not None:
+            shadow.submit(data.text, prediction_num, confidence)
         
         return response
+    except QueueFull:
+        # Rejected before any scoring, so don't make the retry pay twice
+        rate_limiter.refund(client)
+        raise
     except Exception as e:
         print(f"Prediction error: {e}")
         # Return a proper response structure even for errors
@@ -110,44 +194,57 @@ def predict(data: InputData):
             prediction=0,
             result="error",
             confidence=0.0,
-            text=data.text,
+            text=preview_text(data.text, RESPONSE_TEXT_CHARS),
             timestamp=datetime.datetime.now().isoformat(),
             text_length=len(data.text),
-            word_count=len(data.text.split())
+            word_count=scorer.count_words(data.text)
         )
 
 @app.post("/predict-batch")
-def predict_batch(data: BatchInputData):
+async def predict_batch(data: BatchInputData, request: Request):
+    if not rate_limiter.check_batch_size(len(data.texts)):
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds {rate_limiter.max_batch_size} texts",
+        )
+    cost = max(1, len(data.texts))
+    client = enforce_rate_limit(request, cost)
     try:
         results = []
-        for text in data.texts:
-            X = vectorizer.transform([text])
-            prediction = model.predict(X)
-            probabilities = model.predict_proba(X)[0]
-            confidence = float(probabilities.max())
+        for start in range(0, len(data.texts), BATCH_CHUNK_SIZE):
+            chunk = data.texts[start:start + BATCH_CHUNK_SIZE]
+            # Give the slot back between chunks so interactive requests can interleave
+            async with scheduler.slot("bulk", cost=len(chunk)):
+                scores = await run_in_threadpool(lambda: [score_with_stats(text) for text in chunk])
             
-            # Handle both string and numeric predictions
-            if isinstance(prediction[0], str):
-                result = prediction[0]
-                prediction_num = 1 if result == "spam" else 0
-            else:
-                prediction_num = int(prediction[0])
+            for text, (prediction_num, confidence, word_count) in zip(chunk, scores):
                 result = "spam" if prediction_num == 1 else "ham"
-            
-            result_data = {
-                "prediction": prediction_num,
-                "result": result,
-                "confidence": confidence,
-                "text": text,
-                "timestamp": datetime.datetime.now().isoformat(),
-                "text_length": len(text),
-                "word_count": len(text.split())
-            }
-            
-            results.append(result_data)
-            prediction_history.append(result_data.copy())
+                
+                result_data = {
+                    "prediction": prediction_num,
+                    "result": result,
+                    "confidence": confidence,
+                    "text": preview_text(text, RESPONSE_TEXT_CHARS),
+                    "timestamp": datetime.datetime.now().isoformat(),
+                    "text_length": len(text),
+                    "word_count": word_count
+                }
+                
+                results.append(result_data)
+                
+                if shadow is not None:
+                    shadow.submit(text, prediction_num, confidence)
+        
+        # Store in history and publish the whole batch as a single event
+        entries = [history_entry(r) for r in results]
+        prediction_history.extend(entries)
+        analytics_stream.record(entries)
         
         return {"results": results, "total_processed": len(results)}
+    except QueueFull:
+        # A 503 returns no results, so give back the whole batch's tokens
+        rate_limiter.refund(client, cost)
+        raise
     except Exception as e:
         print(f"Batch prediction error: {e}")
         return {"error": str(e)}
@@ -157,24 +254,77 @@ def get_analytics():
     if not prediction_history:
         return {"message": "No predictions made yet"}
     
-    total_predictions = len(prediction_history)
-    spam_count = sum(1 for p in prediction_history if p["prediction"] == 1)
-    ham_count = total_predictions - spam_count
+    # Aggregates are maintained incrementally by analytics_stream
+    return analytics_stream.summary()
+
+@app.get("/stream")
+async def stream_analytics(request: Request):
+    """Server-Sent Events: a snapshot on connect, then one delta per prediction"""
+    queue, snapshot = analytics_stream.subscribe()
     
-    avg_confidence = np.mean([p["confidence"] for p in prediction_history])
-    avg_text_length = np.mean([p["text_length"] for p in prediction_history])
-    avg_word_count = np.mean([p["word_count"] for p in prediction_history])
+    async def events():
+        try:
+            yield snapshot
+            while not await request.is_disconnected():
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Keep proxies from closing an idle connection
+                    yield ": keepalive\n\n"
+        finally:
+            analytics_stream.unsubscribe(queue)
     
-    return {
-        "total_predictions": total_predictions,
-        "spam_count": spam_count,
-        "ham_count": ham_count,
-        "spam_percentage": (spam_count / total_predictions * 100) if total_predictions > 0 else 0,
-        "average_confidence": float(avg_confidence),
-        "average_text_length": float(avg_text_length),
-        "average_word_count": float(avg_word_count),
-        "recent_predictions": prediction_history[-10:]  # Last 10 predictions
-    }
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/shadow")
+def get_shadow_stats():
+    if shadow is None:
+        return {"enabled": False, "message": "No shadow model configured"}
+    return shadow.stats()
+
+@app.delete("/shadow")
+def reset_shadow_stats():
+    if shadow is None:
+        return {"enabled": False, "message": "No shadow model configured"}
+    shadow.reset()
+    return {"message": "Shadow statistics reset"}
+
+@app.get("/rate-limits")
+async def get_rate_limit_stats():
+    # async so scheduler state is read on the event loop that mutates it
+    return {"limits": rate_limiter.stats(), "scheduler": scheduler.stats()}
+
+def require_memory_admin(request: Request):
+    if memory is None:
+        raise HTTPException(status_code=404, detail="Memory diagnostics are disabled (set MEMORY_DIAGNOSTICS=1)")
+    if not ADMIN_TOKEN:
+        # Snapshots expose source paths and cost memory, so never serve them unauthenticated
+        raise HTTPException(status_code=403, detail="Set ADMIN_TOKEN to use memory diagnostics")
+    if not hmac.compare_digest(request.headers.get("x-admin-token", ""), ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.get("/admin/memory")
+def get_memory_stats(request: Request):
+    require_memory_admin(request)
+    return memory.stats()
+
+@app.post("/admin/memory/snapshot")
+def take_memory_snapshot(request: Request, limit: int = 20):
+    require_memory_admin(request)
+    memory.sample()
+    return memory.take_snapshot(limit=limit)
+
+@app.get("/admin/memory/diff")
+def diff_memory_snapshots(request: Request, base: int = None, current: int = None, limit: int = 20):
+    require_memory_admin(request)
+    try:
+        return memory.diff(base, current, limit=limit)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
 
 @app.get("/history")
 def get_history(limit: int = 50):
@@ -185,4 +335,5 @@ def clear_history():
     global prediction_history
     count = len(prediction_history)
     prediction_history = []
+    analytics_stream.clear()
     return {"message": f"Cleared {count} predictions from history"}
\ No newline at end of file
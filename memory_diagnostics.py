@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Opt-in memory diagnostics for the spam detection API
+tracemalloc snapshots and diffs, per-endpoint allocation counters and an RSS sampler
+
+Enabled with MEMORY_DIAGNOSTICS=1. When disabled nothing here runs: tracemalloc
+is never started, no middleware is installed and no sampler thread exists.
+"""
+import gc
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+import numpy as np
+
+
+def read_rss_bytes():
+    """Current resident set size; falls back to peak RSS where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+        # ru_maxrss is KiB on Linux and bytes on macOS; either way it's only a fallback
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except ImportError:
+        return 0
+
+
+def format_stat(stat):
+    """Serialize a tracemalloc Statistic or StatisticDiff"""
+    frame = stat.traceback[0]
+    data = {
+        "location": f"{frame.filename}:{frame.lineno}",
+        "size_bytes": stat.size,
+        "count": stat.count,
+    }
+    if isinstance(stat, tracemalloc.StatisticDiff):
+        data["size_diff_bytes"] = stat.size_diff
+        data["count_diff"] = stat.count_diff
+    return data
+
+
+class MemoryDiagnostics:
+    """tracemalloc snapshots, per-endpoint allocation counters and a periodic sampler"""
+
+    def __init__(self, frames=1, max_snapshots=5, sample_interval=30.0, max_samples=120, gauges=None):
+        self.frames = frames
+        self.snapshots = deque(maxlen=max_snapshots)
+        self.snapshot_ids = 0
+        self.sample_interval = sample_interval
+        self.samples = deque(maxlen=max_samples)
+        self.gauges = gauges or {}
+        self.lock = threading.Lock()
+        self.endpoints = {}
+        # reset_peak() runs per request, so the process-wide peak is tracked here
+        self.peak_bytes = 0
+        self.stopped = threading.Event()
+        self.sampler = None
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        if self.sample_interval > 0:
+            self.sampler = threading.Thread(target=self._sample_loop, name="memory-sampler", daemon=True)
+            self.sampler.start()
+
+    def stop(self):
+        self.stopped.set()
+        tracemalloc.stop()
+
+    @staticmethod
+    def traced_bytes():
+        return tracemalloc.get_traced_memory()[0]
+
+    def traced_peak_bytes(self):
+        with self.lock:
+            return max(self.peak_bytes, tracemalloc.get_traced_memory()[1])
+
+    def begin_request(self):
+        """Start measuring a request: reset the traced peak and return the current size"""
+        current, peak = tracemalloc.get_traced_memory()
+        with self.lock:
+            self.peak_bytes = max(self.peak_bytes, peak)
+        tracemalloc.reset_peak()
+        return current
+
+    def end_request(self, endpoint, before):
+        """Record the request's allocation peak and net retained bytes since begin_request()"""
+        current, peak = tracemalloc.get_traced_memory()
+        self.record_request(endpoint, peak - before, current - before)
+
+    def record_request(self, endpoint, allocated_bytes, net_bytes):
+        """Add one request's peak allocation and net retained bytes to its endpoint's counters"""
+        with self.lock:
+            counters = self.endpoints.setdefault(
+                endpoint, {"requests": 0, "allocated_bytes": 0, "max_allocated_bytes": 0, "net_bytes": 0})
+            counters["requests"] += 1
+            counters["allocated_bytes"] += allocated_bytes
+            counters["max_allocated_bytes"] = max(counters["max_allocated_bytes"], allocated_bytes)
+            counters["net_bytes"] += net_bytes
+
+    def endpoint_stats(self):
+        with self.lock:
+            return {
+                endpoint: {
+                    **counters,
+                    "allocated_bytes_per_request": counters["allocated_bytes"] / counters["requests"],
+                    "net_bytes_per_request": counters["net_bytes"] / counters["requests"],
+                }
+                for endpoint, counters in self.endpoints.items()
+            }
+
+    def sample(self):
+        """Record RSS, traced memory, GC object count and any registered gauges"""
+        sample = {
+            "timestamp": time.time(),
+            "rss_bytes": read_rss_bytes(),
+            "traced_bytes": self.traced_bytes(),
+            "traced_peak_bytes": self.traced_peak_bytes(),
+            "gc_objects": len(gc.get_objects()),
+        }
+        for name, gauge in self.gauges.items():
+            try:
+                sample[name] = gauge()
+            except Exception as e:
+                sample[name] = f"error: {e}"
+        with self.lock:
+            self.samples.append(sample)
+        return sample
+
+    def _sample_loop(self):
+        while not self.stopped.wait(self.sample_interval):
+            self.sample()
+
+    def take_snapshot(self, limit=20):
+        """Store a filtered snapshot and return its id and top allocation sites"""
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+        with self.lock:
+            self.snapshot_ids += 1
+            snapshot_id = self.snapshot_ids
+            self.snapshots.append((snapshot_id, time.time(), snapshot))
+        return {
+            "snapshot_id": snapshot_id,
+            "top_allocations": [format_stat(s) for s in snapshot.statistics("lineno")[:limit]],
+        }
+
+    def list_snapshots(self):
+        with self.lock:
+            return [{"snapshot_id": sid, "timestamp": ts} for sid, ts, _ in self.snapshots]
+
+    def diff(self, base_id=None, current_id=None, limit=20):
+        """Top allocation sites that grew between two snapshots
+
+        `current_id` defaults to the latest snapshot and `base_id` to the one
+        before `current_id`; an id that is given is always used as is.
+        """
+        with self.lock:
+            by_id = {sid: snapshot for sid, _, snapshot in self.snapshots}
+            ids = list(by_id)
+        if current_id is None:
+            if not ids:
+                raise KeyError("No snapshots taken yet")
+            current_id = ids[-1]
+        if current_id not in by_id:
+            raise KeyError(f"Unknown snapshot id {current_id}; available: {ids}")
+        if base_id is None:
+            position = ids.index(current_id)
+            if position == 0:
+                raise KeyError(f"No snapshot before {current_id} to diff against; available: {ids}")
+            base_id = ids[position - 1]
+        if base_id not in by_id:
+            raise KeyError(f"Unknown snapshot id {base_id}; available: {ids}")
+
+        stats = by_id[current_id].compare_to(by_id[base_id], "lineno")
+        return {
+            "base_id": base_id,
+            "current_id": current_id,
+            "total_size_diff_bytes": sum(s.size_diff for s in stats),
+            "top_differences": [format_stat(s) for s in stats[:limit]],
+        }
+
+    def stats(self):
+        # The sampler thread appends concurrently; iterate over a copy
+        with self.lock:
+            samples = list(self.samples)
+        rss_series = [s["rss_bytes"] for s in samples]
+        return {
+            "enabled": True,
+            "traced_bytes": self.traced_bytes(),
+            "traced_peak_bytes": self.traced_peak_bytes(),
+            "rss_bytes": read_rss_bytes(),
+            "rss_growth_bytes": (rss_series[-1] - rss_series[0]) if len(rss_series) > 1 else 0,
+            "rss_slope_bytes_per_sample": (
+                float(np.polyfit(range(len(rss_series)), rss_series, 1)[0]) if len(rss_series) > 2 else 0.0
+            ),
+            "endpoints": self.endpoint_stats(),
+            "samples": samples,
+            "snapshots": self.list_snapshots(),
+        }
+
+
+def load_memory_diagnostics_from_env(gauges=None):
+    """Start diagnostics when MEMORY_DIAGNOSTICS=1, otherwise return None"""
+    if os.environ.get("MEMORY_DIAGNOSTICS", "0").lower() not in ("1", "true", "yes"):
+        return None
+
+    diagnostics = MemoryDiagnostics(
+        frames=int(os.environ.get("MEMORY_TRACE_FRAMES", "1")),
+        sample_interval=float(os.environ.get("MEMORY_SAMPLE_INTERVAL", "30")),
+        gauges=gauges,
+    )
+    diagnostics.start()
+    print(f"Memory diagnostics enabled (tracemalloc frames={diagnostics.frames}, "
+          f"sample interval={diagnostics.sample_interval}s)")
+    return diagnostics
@@ -2,10 +2,14 @@
 """
 Simple mock server for testing the spam detection frontend locally
 This provides all the same endpoints as the real backend but with mock data
+It is threaded and can inject latency and errors, so it doubles as a load-test target
 """
+import argparse
 import json
 import datetime
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 import random
 
@@ -20,6 +24,19 @@ mock_analytics = {
     "average_text_length": 0.0
 }
 
+# Running sums so analytics are updated per prediction instead of rescanning history
+history_lock = threading.Lock()
+confidence_sum = 0.0
+text_length_sum = 0
+
+# Synthetic latency and error injection (set from the command line)
+config = {
+    "latency_ms": 0.0,
+    "latency_jitter_ms": 0.0,
+    "error_rate": 0.0,
+    "quiet": False,
+}
+
 def add_cors_headers(handler):
     """Add CORS headers to allow frontend access"""
     handler.send_header('Access-Control-Allow-Origin', '*')
@@ -54,26 +71,43 @@ def mock_prediction(text):
         "timestamp": datetime.datetime.now().isoformat()
     }
 
-def update_analytics():
-    """Update analytics based on current history"""
-    global mock_analytics
-    if not mock_history:
-        return
-    
-    total = len(mock_history)
-    spam_count = sum(1 for item in mock_history if item['prediction'] == 1)
-    ham_count = total - spam_count
-    avg_confidence = sum(item['confidence'] for item in mock_history) / total
-    avg_length = sum(item['text_length'] for item in mock_history) / total
+def record_predictions(predictions):
+    """Append predictions to history and fold them into the analytics"""
+    global mock_analytics, confidence_sum, text_length_sum
+    with history_lock:
+        spam_count = mock_analytics["spam_count"]
+        for item in predictions:
+            mock_history.append(item)
+            spam_count += 1 if item['prediction'] == 1 else 0
+            confidence_sum += item['confidence']
+            text_length_sum += item['text_length']
+        
+        total = len(mock_history)
+        mock_analytics = {
+            "total_predictions": total,
+            "spam_count": spam_count,
+            "ham_count": total - spam_count,
+            "spam_percentage": (spam_count / total) * 100 if total > 0 else 0,
+            "average_confidence": confidence_sum / total if total > 0 else 0.0,
+            "average_text_length": text_length_sum / total if total > 0 else 0.0
+        }
+
+def inject_faults(handler):
+    """Sleep for the configured latency; send a 500 and return True for injected errors"""
+    delay_ms = config["latency_ms"]
+    if config["latency_jitter_ms"]:
+        delay_ms = max(0.0, random.gauss(delay_ms, config["latency_jitter_ms"]))
+    if delay_ms:
+        time.sleep(delay_ms / 1000)
     
-    mock_analytics = {
-        "total_predictions": total,
-        "spam_count": spam_count,
-        "ham_count": ham_count,
-        "spam_percentage": (spam_count / total) * 100 if total > 0 else 0,
-        "average_confidence": avg_confidence,
-        "average_text_length": avg_length
-    }
+    if config["error_rate"] and random.random() < config["error_rate"]:
+        handler.send_response(500)
+        add_cors_headers(handler)
+        handler.send_header('Content-type', 'application/json')
+        handler.end_headers()
+        handler.wfile.write(json.dumps({"error": "Injected failure"}).encode())
+        return True
+    return False
 
 class MockSpamDetectionHandler(BaseHTTPRequestHandler):
     def log_message(self, format, *args):
@@ -91,7 +125,11 @@ class MockSpamDetectionHandler(BaseHTTPRequestHandler):
         parsed_path = urlparse(self.path)
         path = parsed_path.path
         
-        print(f"📡 GET {path}")
+        if not config["quiet"]:
+            print(f"📡 GET {path}")
+        
+        if inject_faults(self):
+            return
         
         if path == '/':
             # Root endpoint
@@ -112,7 +150,8 @@ class MockSpamDetectionHandler(BaseHTTPRequestHandler):
             self.send_header('Content-type', 'application/json')
             self.end_headers()
             
-            response = {"history": mock_history[-limit:]}
+            with history_lock:
+                response = {"history": mock_history[-limit:], "total_count": len(mock_history)}
             self.wfile.write(json.dumps(response).encode())
         
         elif path == '/analytics':
@@ -133,7 +172,8 @@ class MockSpamDetectionHandler(BaseHTTPRequestHandler):
         parsed_path = urlparse(self.path)
         path = parsed_path.path
         
-        print(f"📡 POST {path}")
+        if not config["quiet"]:
+            print(f"📡 POST {path}")
         
         # Read request body
         content_length = int(self.headers.get('Content-Length', 0))
@@ -147,6 +187,9 @@ class MockSpamDetectionHandler(BaseHTTPRequestHandler):
             self.end_headers()
             return
         
+        if inject_faults(self):
+            return
+        
         if path == '/predict':
             # Single prediction
             text = data.get('text', '')
@@ -160,8 +203,7 @@ class MockSpamDetectionHandler(BaseHTTPRequestHandler):
             prediction['text'] = text
             
             # Add to history
-            mock_history.append(prediction.copy())
-            update_analytics()
+            record_predictions([prediction.copy()])
             
             self.send_response(200)
             add_cors_headers(self)
@@ -183,11 +225,9 @@ class MockSpamDetectionHandler(BaseHTTPRequestHandler):
                 prediction = mock_prediction(text)
                 prediction['text'] = text
                 results.append(prediction)
-                
-                # Add to history
-                mock_history.append(prediction.copy())
             
-            update_analytics()
+            # Add to history
+            record_predictions([item.copy() for item in results])
             
             response = {
                 "results": results,
@@ -210,20 +250,27 @@ class MockSpamDetectionHandler(BaseHTTPRequestHandler):
         parsed_path = urlparse(self.path)
         path = parsed_path.path
         
-        print(f"📡 DELETE {path}")
+        if not config["quiet"]:
+            print(f"📡 DELETE {path}")
+        
+        if inject_faults(self):
+            return
         
         if path == '/history':
             # Clear history
-            global mock_history, mock_analytics
-            mock_history = []
-            mock_analytics = {
-                "total_predictions": 0,
-                "spam_count": 0,
-                "ham_count": 0,
-                "spam_percentage": 0.0,
-                "average_confidence": 0.0,
-                "average_text_length": 0.0
-            }
+            global mock_history, mock_analytics, confidence_sum, text_length_sum
+            with history_lock:
+                mock_history = []
+                confidence_sum = 0.0
+                text_length_sum = 0
+                mock_analytics = {
+                    "total_predictions": 0,
+                    "spam_count": 0,
+                    "ham_count": 0,
+                    "spam_percentage": 0.0,
+                    "average_confidence": 0.0,
+                    "average_text_length": 0.0
+                }
             
             self.send_response(200)
             add_cors_headers(self)
@@ -237,9 +284,29 @@ class MockSpamDetectionHandler(BaseHTTPRequestHandler):
             add_cors_headers(self)
             self.end_headers()
 
+def create_server(port=8000, host='localhost'):
+    """Create the threaded mock server; one thread per connection"""
+    server = ThreadingHTTPServer((host, port), MockSpamDetectionHandler)
+    server.daemon_threads = True
+    return server
+
 def main():
-    port = 8000
-    server = HTTPServer(('localhost', port), MockSpamDetectionHandler)
+    parser = argparse.ArgumentParser(description="Mock Spam Detection API Server")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Mean synthetic latency per request")
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0, help="Std deviation of synthetic latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--quiet", action="store_true", help="Don't log each request (use under load)")
+    args = parser.parse_args()
+    
+    config.update(
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        error_rate=args.error_rate,
+        quiet=args.quiet,
+    )
+    port = args.port
+    server = create_server(port)
     
     print("🎭 Mock Spam Detection API Server")
     print("=" * 40)
@@ -251,6 +318,8 @@ def main():
     print(f"   GET  /history       - Get prediction history")
     print(f"   GET  /analytics     - Get analytics")
     print(f"   DELETE /history     - Clear history")
+    if args.latency_ms or args.error_rate:
+        print(f"⏱️  Synthetic latency: {args.latency_ms} ms ± {args.latency_jitter_ms} ms, error rate: {args.error_rate:.1%}")
     print("=" * 40)
     print("🔥 Frontend should now connect successfully!")
     print("⏹️  Press Ctrl+C to stop the server")
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Per-client rate limiting and weighted fair queuing in front of inference
+Keeps a single bulk client from starving interactive /predict traffic
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+import numpy as np
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, up to `burst` stored"""
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def refill(self, now):
+        elapsed = max(0.0, now - self.updated)
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        self.updated = max(now, self.updated)
+
+    def take(self, cost, now):
+        """Take `cost` tokens; return 0 on success or seconds until they are available"""
+        self.refill(now)
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0
+        return (cost - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Token buckets keyed by allowlisted API key or client IP, plus request size limits"""
+
+    def __init__(self, rate=20.0, burst=100, max_batch_size=100, max_payload_bytes=16 * 1024 * 1024,
+                 max_clients=10000, api_keys=(), trusted_proxy_hops=0):
+        self.rate = rate
+        self.burst = burst
+        self.max_batch_size = max_batch_size
+        self.max_payload_bytes = max_payload_bytes
+        self.max_clients = max_clients
+        self.api_keys = frozenset(api_keys)
+        self.trusted_proxy_hops = trusted_proxy_hops
+        self.lock = threading.Lock()
+        self.buckets = {}
+        # Clients beyond the bucket cap share one bucket, so new keys can't mint fresh ones
+        self.overflow = None
+        self.last_prune = 0.0
+        self.allowed = 0
+        self.overflowed = 0
+        self.refunded = 0
+        self.throttled = {"rate": 0, "batch_size": 0, "payload_bytes": 0}
+
+    def client_ip(self, request):
+        """Client IP, taken from X-Forwarded-For only behind a configured number of proxies"""
+        if self.trusted_proxy_hops > 0:
+            forwarded = [ip.strip() for ip in request.headers.get("x-forwarded-for", "").split(",") if ip.strip()]
+            # Each trusted proxy appends the address it saw; anything further left is client-supplied
+            if len(forwarded) >= self.trusted_proxy_hops:
+                return forwarded[-self.trusted_proxy_hops]
+        return request.client.host if request.client else "unknown"
+
+    def client_key(self, request):
+        """Identify the caller by an allowlisted X-API-Key, falling back to the client IP"""
+        api_key = request.headers.get("x-api-key")
+        if api_key and api_key in self.api_keys:
+            return f"key:{api_key}"
+        return f"ip:{self.client_ip(request)}"
+
+    def check_payload(self, size):
+        """Return False (and count it) when a request body is over the byte limit"""
+        if size is not None and size > self.max_payload_bytes:
+            with self.lock:
+                self.throttled["payload_bytes"] += 1
+            return False
+        return True
+
+    def check_batch_size(self, size):
+        """Return False (and count it) when a batch has too many texts"""
+        if size > self.max_batch_size:
+            with self.lock:
+                self.throttled["batch_size"] += 1
+            return False
+        return True
+
+    def acquire(self, key, cost=1):
+        """Charge `cost` tokens to a client; return 0 if allowed, else Retry-After seconds"""
+        # A batch bigger than the burst could never be admitted otherwise
+        cost = min(cost, self.burst)
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                if len(self.buckets) >= self.max_clients:
+                    self._prune(now)
+                if len(self.buckets) < self.max_clients:
+                    bucket = self.buckets[key] = TokenBucket(self.rate, self.burst, now)
+                else:
+                    self.overflowed += 1
+                    if self.overflow is None:
+                        self.overflow = TokenBucket(self.rate, self.burst, now)
+                    bucket = self.overflow
+            retry_after = bucket.take(cost, now)
+            if retry_after:
+                self.throttled["rate"] += 1
+            else:
+                self.allowed += 1
+            return retry_after
+
+    def refund(self, key, cost=1):
+        """Return tokens charged by acquire() for a request that was never served"""
+        cost = min(cost, self.burst)
+        with self.lock:
+            # A key with no bucket of its own was charged to the overflow bucket
+            bucket = self.buckets.get(key, self.overflow)
+            if bucket is not None:
+                bucket.tokens = min(bucket.burst, bucket.tokens + cost)
+            self.allowed -= 1
+            self.refunded += 1
+
+    def _prune(self, now):
+        # Scanning every bucket is O(clients); do it at most once a second
+        if now - self.last_prune < 1.0:
+            return
+        self.last_prune = now
+        # A bucket that would have refilled completely is the same as a new one
+        idle = [key for key, bucket in self.buckets.items()
+                if bucket.tokens + (now - bucket.updated) * bucket.rate >= bucket.burst]
+        for key in idle:
+            del self.buckets[key]
+
+    def stats(self):
+        with self.lock:
+            return {
+                "rate_per_second": self.rate,
+                "burst": self.burst,
+                "max_batch_size": self.max_batch_size,
+                "max_payload_bytes": self.max_payload_bytes,
+                "tracked_clients": len(self.buckets),
+                "max_clients": self.max_clients,
+                "overflowed": self.overflowed,
+                "allowed": self.allowed,
+                "refunded": self.refunded,
+                "throttled": dict(self.throttled),
+            }
+
+
+class QueueFull(Exception):
+    """Raised when a request class already has its maximum number of waiters"""
+
+    def __init__(self, cls):
+        super().__init__(f"Too many queued {cls} requests")
+        self.cls = cls
+
+
+class FairScheduler:
+    """Weighted fair queuing over a fixed number of inference slots
+
+    Each request class gets a share of slots proportional to its weight. Work
+    is ordered by virtual finish time, so a class that has sent a lot of work
+    recently waits behind a class that has not. Waiting happens on the event
+    loop, so queued requests don't hold threadpool threads; callers run the
+    actual inference in the threadpool once they have a slot.
+    """
+
+    def __init__(self, slots=2, weights=None, max_queued=100, wait_window=1000):
+        self.weights = weights or {"interactive": 4, "bulk": 1}
+        self.free = slots
+        self.slots = slots
+        self.max_queued = max_queued
+        self.virtual_time = 0.0
+        self.last_finish = {cls: 0.0 for cls in self.weights}
+        self.waiting = []
+        self.queued = {cls: 0 for cls in self.weights}
+        self.sequence = itertools.count()
+        self.scheduled = {cls: 0 for cls in self.weights}
+        self.rejected = {cls: 0 for cls in self.weights}
+        self.waits_ms = {cls: deque(maxlen=wait_window) for cls in self.weights}
+
+    @asynccontextmanager
+    async def slot(self, cls, cost=1):
+        """Hold one inference slot while the block runs"""
+        start = time.perf_counter()
+        tag = max(self.virtual_time, self.last_finish[cls]) + cost / self.weights[cls]
+        if self.free > 0 and not self.waiting:
+            self.free -= 1
+            self.last_finish[cls] = tag
+        else:
+            if self.queued[cls] >= self.max_queued:
+                self.rejected[cls] += 1
+                raise QueueFull(cls)
+            self.last_finish[cls] = tag
+            future = asyncio.get_running_loop().create_future()
+            entry = (tag, next(self.sequence), cls, future)
+            heapq.heappush(self.waiting, entry)
+            self.queued[cls] += 1
+            try:
+                # _release() hands a slot over by resolving the future
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # The slot was handed over just as the client went away
+                    self._release()
+                elif entry in self.waiting:
+                    self.waiting.remove(entry)
+                    heapq.heapify(self.waiting)
+                raise
+            finally:
+                self.queued[cls] -= 1
+
+        self.virtual_time = tag
+        self.scheduled[cls] += 1
+        self.waits_ms[cls].append((time.perf_counter() - start) * 1000)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self):
+        # Pass the slot straight to the next waiter that is still waiting
+        while self.waiting:
+            _, _, _, future = heapq.heappop(self.waiting)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.free += 1
+
+    def stats(self):
+        stats = {
+            "slots": self.slots,
+            "busy_slots": self.slots - self.free,
+            "queued": dict(self.queued),
+            "max_queued": self.max_queued,
+            "weights": dict(self.weights),
+            "classes": {},
+        }
+        for cls, waits in self.waits_ms.items():
+            waits = list(waits)
+            stats["classes"][cls] = {
+                "scheduled": self.scheduled[cls],
+                "rejected": self.rejected[cls],
+                "average_wait_ms": float(np.mean(waits)) if waits else 0.0,
+                "p99_wait_ms": float(np.percentile(waits, 99)) if waits else 0.0,
+            }
+        return stats
+
+
+class PayloadTooLarge(Exception):
+    pass
+
+
+class PayloadLimitMiddleware:
+    """ASGI middleware enforcing the byte limit on POST bodies
+
+    Content-Length is checked up front. Bodies without it (chunked uploads) are
+    counted as they arrive and answered with 413 as soon as the limit is passed.
+    """
+
+    def __init__(self, app, limiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit():
+            if not self.limiter.check_payload(int(content_length)):
+                await self._reject(send)
+                return
+
+        limit = self.limiter.max_payload_bytes
+        received = 0
+        exceeded = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True
+                    self.limiter.check_payload(received)
+                    raise PayloadTooLarge()
+            return message
+
+        async def guarded_send(message):
+            # The app may turn the failed body read into its own error; replace it with 413
+            if not exceeded:
+                await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded:
+                raise
+        if exceeded:
+            await self._reject(send)
+
+    async def _reject(self, send):
+        body = json.dumps({"detail": f"Payload exceeds {self.limiter.max_payload_bytes} bytes"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def load_limits_from_env():
+    """Build the limiter and scheduler from RATE_LIMIT_* / FAIR_QUEUE_* settings"""
+    limiter = RateLimiter(
+        rate=float(os.environ.get("RATE_LIMIT_RPS", "20")),
+        burst=int(os.environ.get("RATE_LIMIT_BURST", "100")),
+        max_batch_size=int(os.environ.get("MAX_BATCH_SIZE", "100")),
+        max_payload_bytes=int(os.environ.get("MAX_PAYLOAD_BYTES", str(16 * 1024 * 1024))),
+        max_clients=int(os.environ.get("RATE_LIMIT_MAX_CLIENTS", "10000")),
+        api_keys=[key.strip() for key in os.environ.get("API_KEYS", "").split(",") if key.strip()],
+        trusted_proxy_hops=int(os.environ.get("TRUSTED_PROXY_HOPS", "0")),
+    )
+    scheduler = FairScheduler(
+        slots=int(os.environ.get("INFERENCE_SLOTS", "2")),
+        weights={
+            "interactive": float(os.environ.get("FAIR_QUEUE_INTERACTIVE_WEIGHT", "4")),
+            "bulk": float(os.environ.get("FAIR_QUEUE_BULK_WEIGHT", "1")),
+        },
+        max_queued=int(os.environ.get("FAIR_QUEUE_MAX_QUEUED", "100")),
+    )
+    return limiter, scheduler
@@ -9,6 +9,8 @@ from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report
 import joblib
+import datetime
+import sys
 
 # Create sample spam detection data
 # In a real scenario, you'd load this from a dataset
@@ -107,9 +109,20 @@ for msg in test_messages:
     print()
 
 # Save the models
+if "--shadow" in sys.argv:
+    # Save alongside the live models so the service can score them as a shadow first
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    vectorizer_file = f"count_vectorizer_{timestamp}.pkl"
+    model_file = f"logistic_regression_model_{timestamp}.pkl"
+else:
+    vectorizer_file = 'count_vectorizer.pkl'
+    model_file = 'logistic_regression_model.pkl'
+
 print("Saving models...")
-joblib.dump(vectorizer, 'count_vectorizer.pkl')
-joblib.dump(model, 'logistic_regression_model.pkl')
+joblib.dump(vectorizer, vectorizer_file)
+joblib.dump(model, model_file)
 
-print("✅ New models saved successfully!")
+print(f"✅ New models saved successfully: {vectorizer_file}, {model_file}")
+if "--shadow" in sys.argv:
+    print(f"🔍 Run as shadow with: SHADOW_VECTORIZER={vectorizer_file} SHADOW_MODEL={model_file}")
 print("✅ Models are now compatible with current scikit-learn version")
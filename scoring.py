@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Text scoring shared by the API and the shadow evaluator
+Long texts are scored in bounded windows so cost does not grow with input size
+"""
+import math
+import os
+import re
+
+_WHITESPACE = re.compile(r"\s")
+
+AGGREGATES = ("max", "mean")
+
+
+def to_prediction_num(label):
+    """Map a model label ('spam'/'ham' or 1/0) to 0/1"""
+    if isinstance(label, str):
+        return 1 if label == "spam" else 0
+    return int(label)
+
+
+def spam_probability(prediction_num, confidence):
+    """P(spam) from a binary result whose confidence is the winning class probability"""
+    return confidence if prediction_num == 1 else 1.0 - confidence
+
+
+def score_text(vectorizer, model, text):
+    """Return (prediction_num, confidence) for a single text"""
+    X = vectorizer.transform([text])
+    prediction = model.predict(X)
+    probabilities = model.predict_proba(X)[0]
+    confidence = float(probabilities.max())
+
+    # Handle both string and numeric predictions
+    return to_prediction_num(prediction[0]), confidence
+
+
+def count_words(text, slice_chars=65536):
+    """Same result as len(text.split()) without building one list for the whole text"""
+    if len(text) <= slice_chars:
+        return len(text.split())
+    count = 0
+    for start in range(0, len(text), slice_chars):
+        count += len(text[start:start + slice_chars].split())
+        # A word straddling the slice edge was counted in both slices
+        if start and not text[start - 1].isspace() and not text[start].isspace():
+            count -= 1
+    return count
+
+
+class TextScorer:
+    """Score texts, switching to windowed scoring above `max_chars`
+
+    A long text is scored as a head window (subject and opening lines) plus up to
+    `max_windows` windows sampled evenly from the rest. Each window gets its own
+    logit from the linear model and the logits are max-pooled (or averaged), so
+    at most head_chars + max_windows * window_chars characters are ever analyzed.
+
+    Max-pooling flags a text when any window looks like spam, so spam can't be
+    hidden by padding it with benign text. Averaging lets the padding win.
+    """
+
+    def __init__(self, vectorizer, model, max_chars=16384, head_chars=8192, window_chars=4096,
+                 max_windows=8, aggregate="max"):
+        for name, value in (("max_chars", max_chars), ("head_chars", head_chars),
+                            ("window_chars", window_chars), ("max_windows", max_windows)):
+            if value < 1:
+                raise ValueError(f"{name} must be at least 1, got {value}")
+        if aggregate not in AGGREGATES:
+            raise ValueError(f"aggregate must be one of {AGGREGATES}, got {aggregate!r}")
+        self.vectorizer = vectorizer
+        self.model = model
+        self.max_chars = max_chars
+        self.head_chars = head_chars
+        self.window_chars = window_chars
+        self.max_windows = max_windows
+        self.aggregate = aggregate
+        # Per-window logits need a binary linear model
+        self.windowed = hasattr(model, "decision_function") and len(getattr(model, "classes_", ())) == 2
+        if not self.windowed:
+            print("Long text windowing disabled: model has no binary decision_function")
+
+    def is_long(self, text):
+        return self.windowed and len(text) > self.max_chars
+
+    def score(self, text):
+        """Return (prediction_num, confidence) with bounded cost for long texts"""
+        if not self.is_long(text):
+            return score_text(self.vectorizer, self.model, text)
+
+        logits = [self._window_logit(window) for window in self.windows(text)]
+        if self.aggregate == "mean":
+            logit = sum(logits) / len(logits)
+        else:
+            logit = max(logits)
+
+        label = self.model.classes_[1 if logit > 0 else 0]
+        confidence = 1.0 / (1.0 + math.exp(-abs(logit)))
+        return to_prediction_num(label), confidence
+
+    def count_words(self, text):
+        """Exact word count up to `max_chars`; above that, estimated from the windows
+
+        The estimate scales the word density of the scored windows to the full
+        length, so counting costs the same as scoring however long the text is.
+        """
+        if len(text) <= self.max_chars:
+            return count_words(text)
+        words = chars = 0
+        for window in self.windows(text):
+            words += count_words(window)
+            chars += len(window)
+        return round(words * len(text) / chars) if chars else 0
+
+    def _window_logit(self, window):
+        X = self.vectorizer.transform([window])
+        return float(self.model.decision_function(X)[0])
+
+    def windows(self, text):
+        """Yield the head window, then evenly sampled windows from the remainder"""
+        length = len(text)
+        head_end = _cut_end(text, 0, min(self.head_chars, length))
+        yield text[:head_end]
+
+        remaining = length - head_end
+        if remaining <= 0:
+            return
+        if remaining <= self.max_windows * self.window_chars:
+            # Short enough to cover completely with contiguous windows
+            start = head_end
+            while start < length:
+                end = _cut_end(text, start, min(start + self.window_chars, length))
+                yield text[start:end]
+                start = end
+            return
+
+        stride = remaining / self.max_windows
+        offset = (stride - self.window_chars) / 2
+        for i in range(self.max_windows):
+            start = int(head_end + i * stride + offset)
+            end = min(start + self.window_chars, length)
+            start = _cut_start(text, start, end)
+            end = _cut_end(text, start, end)
+            if start < end:
+                yield text[start:end]
+
+
+def _cut_start(text, start, end):
+    # Move a window start forward past a partial word
+    if start == 0 or _WHITESPACE.match(text, start - 1):
+        return start
+    match = _WHITESPACE.search(text, start, end)
+    return match.end() if match else start
+
+
+def _cut_end(text, start, end):
+    # Move a window end back so it doesn't split a word
+    if end >= len(text) or _WHITESPACE.match(text, end):
+        return end
+    cut = max(text.rfind(" ", start, end), text.rfind("\n", start, end))
+    return cut if cut > start else end
+
+
+def text_scorer_from_env(vectorizer, model):
+    """Build a TextScorer from LONG_TEXT_* settings; raises ValueError on invalid values"""
+    return TextScorer(
+        vectorizer,
+        model,
+        max_chars=int(os.environ.get("LONG_TEXT_MAX_CHARS", "16384")),
+        head_chars=int(os.environ.get("LONG_TEXT_HEAD_CHARS", "8192")),
+        window_chars=int(os.environ.get("LONG_TEXT_WINDOW_CHARS", "4096")),
+        max_windows=int(os.environ.get("LONG_TEXT_MAX_WINDOWS", "8")),
+        aggregate=os.environ.get("LONG_TEXT_AGGREGATE", "max"),
+    )
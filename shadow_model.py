@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Shadow model evaluation alongside production scoring
+Scores a sample of live traffic with a candidate model in the background
+"""
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+import numpy as np
+
+from fast_vectorizer import FastCountVectorizer
+from scoring import spam_probability, text_scorer_from_env
+
+
+class ShadowEvaluator:
+    """Score sampled requests with a shadow model and track agreement with production"""
+
+    def __init__(self, scorer, sample_rate=0.1, max_pending=100, latency_window=1000):
+        self.scorer = scorer
+        self.sample_rate = sample_rate
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+        self.lock = threading.Lock()
+        self.latencies_ms = deque(maxlen=latency_window)
+        self.pending = 0
+        self.reset()
+
+    def reset(self):
+        """Clear all recorded comparison statistics"""
+        with self.lock:
+            self.scored = 0
+            self.agreements = 0
+            self.skipped = 0
+            self.dropped = 0
+            self.errors = 0
+            self.spam_probability_delta_sum = 0.0
+            self.abs_spam_probability_delta_sum = 0.0
+            self.spam_flips = 0
+            self.ham_flips = 0
+            self.latencies_ms.clear()
+
+    def submit(self, text, prediction, confidence):
+        """Queue a production result for shadow scoring; never blocks the caller"""
+        if random.random() >= self.sample_rate:
+            with self.lock:
+                self.skipped += 1
+            return
+        with self.lock:
+            # Drop samples rather than build an unbounded backlog under load
+            if self.pending >= self.max_pending:
+                self.dropped += 1
+                return
+            self.pending += 1
+        self.executor.submit(self._evaluate, text, prediction, confidence)
+
+    def _evaluate(self, text, prediction, confidence):
+        try:
+            start = time.perf_counter()
+            shadow_prediction, shadow_confidence = self.scorer.score(text)
+            latency_ms = (time.perf_counter() - start) * 1000
+        except Exception as e:
+            print(f"Shadow prediction error: {e}")
+            with self.lock:
+                self.pending -= 1
+                self.errors += 1
+            return
+
+        # Compare P(spam), not the winning class probability, so a flipped
+        # prediction at similar certainty shows up as a large delta
+        delta = spam_probability(shadow_prediction, shadow_confidence) - spam_probability(prediction, confidence)
+        with self.lock:
+            self.pending -= 1
+            self.scored += 1
+            self.latencies_ms.append(latency_ms)
+            self.spam_probability_delta_sum += delta
+            self.abs_spam_probability_delta_sum += abs(delta)
+            if shadow_prediction == prediction:
+                self.agreements += 1
+            elif shadow_prediction == 1:
+                self.spam_flips += 1
+            else:
+                self.ham_flips += 1
+
+    def stats(self):
+        """Return agreement, P(spam) delta and latency statistics for the shadow model"""
+        with self.lock:
+            scored = self.scored
+            latencies = list(self.latencies_ms)
+            stats = {
+                "enabled": True,
+                "sample_rate": self.sample_rate,
+                "scored": scored,
+                "skipped": self.skipped,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "pending": self.pending,
+                "agreements": self.agreements,
+                "agreement_rate": (self.agreements / scored) if scored > 0 else 0,
+                "ham_to_spam": self.spam_flips,
+                "spam_to_ham": self.ham_flips,
+                "average_spam_probability_delta": (self.spam_probability_delta_sum / scored) if scored > 0 else 0,
+                "average_abs_spam_probability_delta": (
+                    (self.abs_spam_probability_delta_sum / scored) if scored > 0 else 0
+                ),
+            }
+
+        if latencies:
+            stats["latency_ms"] = {
+                "average": float(np.mean(latencies)),
+                "p50": float(np.percentile(latencies, 50)),
+                "p95": float(np.percentile(latencies, 95)),
+                "p99": float(np.percentile(latencies, 99)),
+                "max": float(np.max(latencies)),
+            }
+        else:
+            stats["latency_ms"] = None
+        return stats
+
+
+def load_shadow_from_env():
+    """Load the shadow pair named by SHADOW_VECTORIZER/SHADOW_MODEL, or return None"""
+    vectorizer_file = os.environ.get("SHADOW_VECTORIZER")
+    model_file = os.environ.get("SHADOW_MODEL")
+    if not vectorizer_file or not model_file:
+        return None
+
+    sample_rate = float(os.environ.get("SHADOW_SAMPLE_RATE", "0.1"))
+    try:
+        vectorizer = FastCountVectorizer(joblib.load(vectorizer_file))
+        model = joblib.load(model_file)
+        print(f"Shadow model loaded: {vectorizer_file}, {model_file} (sample rate {sample_rate})")
+        # Score the same way production does, including long text windowing
+        return ShadowEvaluator(text_scorer_from_env(vectorizer, model), sample_rate=sample_rate)
+    except Exception as e:
+        print(f"Failed to load shadow model: {e}")
+        return None
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the incremental aggregates and SSE queues in analytics_stream.py
+"""
+import asyncio
+import random
+
+import numpy as np
+import pytest
+
+from analytics_stream import AnalyticsStream
+
+
+def full_scan(history):
+    """The GET /analytics computation that rescanned prediction_history"""
+    total_predictions = len(history)
+    spam_count = sum(1 for p in history if p["prediction"] == 1)
+    return {
+        "total_predictions": total_predictions,
+        "spam_count": spam_count,
+        "ham_count": total_predictions - spam_count,
+        "spam_percentage": (spam_count / total_predictions * 100) if total_predictions > 0 else 0,
+        "average_confidence": float(np.mean([p["confidence"] for p in history])),
+        "average_text_length": float(np.mean([p["text_length"] for p in history])),
+        "average_word_count": float(np.mean([p["word_count"] for p in history])),
+        "recent_predictions": history[-10:],
+    }
+
+
+def make_prediction(rng, i):
+    return {
+        "prediction": rng.randint(0, 1),
+        "confidence": rng.random(),
+        "text": f"text {i}",
+        "text_length": rng.randint(1, 5000),
+        "word_count": rng.randint(1, 800),
+    }
+
+
+def record_mixed(stream, history, rng, count):
+    """Record `count` predictions as a mix of single calls and batches"""
+    while count > 0:
+        size = min(count, rng.choice([1, 1, 3, 10]))
+        batch = [make_prediction(rng, len(history) + i) for i in range(size)]
+        history.extend(batch)
+        stream.record(batch)
+        count -= size
+
+
+def assert_matches_full_scan(summary, history):
+    expected = full_scan(history)
+    assert summary.keys() == expected.keys()
+    for key, value in expected.items():
+        if isinstance(value, float):
+            assert summary[key] == pytest.approx(value)
+        else:
+            assert summary[key] == value
+
+
+def test_summary_matches_full_scan_across_batches_and_clear():
+    rng = random.Random(0)
+    stream = AnalyticsStream()
+    history = []
+    record_mixed(stream, history, rng, 57)
+    assert_matches_full_scan(stream.summary(), history)
+
+    stream.clear()
+    history = []
+    assert stream.summary()["total_predictions"] == 0
+    record_mixed(stream, history, rng, 23)
+    assert_matches_full_scan(stream.summary(), history)
+
+
+def test_full_subscriber_queue_keeps_newest_events():
+    async def scenario():
+        stream = AnalyticsStream(queue_size=2)
+        queue, _ = stream.subscribe()
+        for i in range(5):
+            stream.record([make_prediction(random.Random(i), i)])
+        # Deliveries are scheduled on the loop; let them run
+        await asyncio.sleep(0)
+        return [await queue.get() for _ in range(queue.qsize())]
+
+    events = asyncio.run(scenario())
+    assert len(events) == 2
+    assert '"text": "text 3"' in events[0]
+    assert '"text": "text 4"' in events[1]
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Check FastCountVectorizer against sklearn's CountVectorizer on a randomized corpus
+"""
+import random
+import joblib
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer, ENGLISH_STOP_WORDS
+
+from fast_vectorizer import FastCountVectorizer
+
+N_DOCS = 5000
+
+
+def random_corpus(vocabulary, n_docs, seed=42):
+    """Build documents mixing vocabulary words, stop words, noise and unicode"""
+    rng = random.Random(seed)
+    words = list(vocabulary) + sorted(ENGLISH_STOP_WORDS)
+    noise = ["x", "42", "$1000", "e-mail", "don't", "café", "naïve", "ÉCOLE",
+             "über", "straße", "İstanbul", "日本語", "a_b", "__", "URL:http://spam.example"]
+    separators = [" ", "  ", "\n", "\t", "! ", ", ", ". ", "?", "-", "/", ""]
+    corpus = []
+    for _ in range(n_docs):
+        parts = []
+        for _ in range(rng.randint(0, 60)):
+            word = rng.choice(words) if rng.random() < 0.8 else rng.choice(noise)
+            casing = rng.random()
+            if casing < 0.2:
+                word = word.upper()
+            elif casing < 0.4:
+                word = word.capitalize()
+            parts.append(word + rng.choice(separators))
+        corpus.append("".join(parts))
+    return corpus
+
+
+def assert_same_transform(vectorizer, corpus):
+    expected = vectorizer.transform(corpus)
+    actual = FastCountVectorizer(vectorizer).transform(corpus)
+
+    assert actual.shape == expected.shape
+    assert actual.dtype == expected.dtype
+    assert np.array_equal(actual.indptr, expected.indptr)
+    assert np.array_equal(actual.indices, expected.indices)
+    assert np.array_equal(actual.data, expected.data)
+
+
+def test_matches_saved_vectorizer():
+    vectorizer = joblib.load("count_vectorizer.pkl")
+    corpus = random_corpus(vectorizer.vocabulary_, N_DOCS)
+    assert_same_transform(vectorizer, corpus)
+
+
+def test_matches_ngram_vectorizer():
+    train = random_corpus(["free", "money", "click", "here", "meeting", "today"], 200, seed=1)
+    vectorizer = CountVectorizer(stop_words="english", ngram_range=(1, 3), strip_accents="unicode")
+    vectorizer.fit(train)
+    corpus = random_corpus(vectorizer.vocabulary_, N_DOCS, seed=7)
+    assert_same_transform(vectorizer, corpus)
+
+
+def test_matches_binary_vocabulary_with_stop_words():
+    # A fixed vocabulary may contain stop words; sklearn never counts them
+    vocabulary = ["free", "the", "money", "and", "click"]
+    vectorizer = CountVectorizer(vocabulary=vocabulary, stop_words="english", binary=True)
+    vectorizer.fit([])
+    corpus = random_corpus(vocabulary, N_DOCS, seed=3)
+    assert_same_transform(vectorizer, corpus)
+
+
+def test_falls_back_for_char_analyzer():
+    vectorizer = CountVectorizer(analyzer="char_wb", ngram_range=(2, 3))
+    vectorizer.fit(["free money", "see you at the meeting"])
+    assert_same_transform(vectorizer, ["free meeting", "money!", ""])
+
+
+if __name__ == "__main__":
+    test_matches_saved_vectorizer()
+    test_matches_ngram_vectorizer()
+    test_matches_binary_vocabulary_with_stop_words()
+    test_falls_back_for_char_analyzer()
+    print("✅ FastCountVectorizer matches sklearn")
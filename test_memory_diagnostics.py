@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Unit tests for snapshot diffs and per-request allocation counters in memory_diagnostics.py
+"""
+import pytest
+
+from memory_diagnostics import MemoryDiagnostics
+
+
+@pytest.fixture
+def diagnostics():
+    diagnostics = MemoryDiagnostics(sample_interval=0)
+    diagnostics.start()
+    yield diagnostics
+    diagnostics.stop()
+
+
+def take_snapshots(diagnostics, count):
+    for _ in range(count):
+        diagnostics.take_snapshot(limit=1)
+
+
+def test_diff_defaults_only_the_missing_ids(diagnostics):
+    take_snapshots(diagnostics, 3)
+    assert (diagnostics.diff()["base_id"], diagnostics.diff()["current_id"]) == (2, 3)
+    explicit_base = diagnostics.diff(base_id=1)
+    assert (explicit_base["base_id"], explicit_base["current_id"]) == (1, 3)
+    explicit_current = diagnostics.diff(current_id=2)
+    assert (explicit_current["base_id"], explicit_current["current_id"]) == (1, 2)
+
+
+@pytest.mark.parametrize("base_id, current_id", [(1, 99), (99, 2), (None, 1)])
+def test_diff_rejects_unknown_or_missing_snapshots(diagnostics, base_id, current_id):
+    take_snapshots(diagnostics, 2)
+    with pytest.raises(KeyError):
+        diagnostics.diff(base_id, current_id)
+
+
+def test_request_allocation_is_the_peak_not_the_net_change(diagnostics):
+    before = diagnostics.begin_request()
+    buffer = bytearray(1024 * 1024)
+    del buffer
+    diagnostics.end_request("POST /predict", before)
+    counters = diagnostics.endpoint_stats()["POST /predict"]
+    assert counters["allocated_bytes_per_request"] >= 1024 * 1024
+    assert counters["net_bytes_per_request"] < 1024 * 1024
+    # The process-wide peak survives the per-request reset
+    assert diagnostics.stats()["traced_peak_bytes"] >= 1024 * 1024
+
+
+def test_diff_endpoint_returns_404_for_unknown_ids(diagnostics, monkeypatch):
+    from fastapi.testclient import TestClient
+    import main
+
+    monkeypatch.setattr(main, "memory", diagnostics)
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    take_snapshots(diagnostics, 3)
+    client = TestClient(main.app)
+    headers = {"X-Admin-Token": "secret"}
+    response = client.get("/admin/memory/diff?base=1", headers=headers)
+    assert (response.json()["base_id"], response.json()["current_id"]) == (1, 3)
+    assert client.get("/admin/memory/diff?base=1&current=99", headers=headers).status_code == 404
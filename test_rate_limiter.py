@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the token buckets, client keys and fair scheduler in rate_limiter.py
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from rate_limiter import FairScheduler, QueueFull, RateLimiter, TokenBucket
+
+
+def fake_request(headers=None, host="10.0.0.1"):
+    return SimpleNamespace(headers=headers or {}, client=SimpleNamespace(host=host))
+
+
+def test_new_bucket_holds_full_burst():
+    bucket = TokenBucket(rate=20, burst=100, now=50.0)
+    assert bucket.take(100, 50.0) == 0
+    assert bucket.take(1, 50.0) == pytest.approx(1 / 20)
+
+
+def test_bucket_refills_at_rate_and_caps_at_burst():
+    bucket = TokenBucket(rate=10, burst=5, now=0.0)
+    assert bucket.take(5, 0.0) == 0
+    assert bucket.take(3, 0.2) == pytest.approx(0.1)
+    assert bucket.take(3, 0.3) == 0
+    bucket.refill(100.0)
+    assert bucket.tokens == 5
+
+
+def test_bucket_ignores_clock_going_backwards():
+    bucket = TokenBucket(rate=10, burst=5, now=10.0)
+    bucket.refill(9.0)
+    assert bucket.tokens == 5
+
+
+def test_first_full_batch_from_new_client_is_allowed():
+    limiter = RateLimiter(rate=20, burst=100)
+    for i in range(60):
+        assert limiter.acquire(f"ip:client-{i}", 100) == 0
+    assert limiter.stats()["throttled"]["rate"] == 0
+
+
+def test_batch_cost_is_capped_at_burst():
+    limiter = RateLimiter(rate=1, burst=10)
+    assert limiter.acquire("k", 500) == 0
+
+
+def test_only_allowlisted_api_keys_get_their_own_bucket():
+    limiter = RateLimiter(api_keys=["good"])
+    assert limiter.client_key(fake_request({"x-api-key": "good"})) == "key:good"
+    assert limiter.client_key(fake_request({"x-api-key": "made-up"})) == "ip:10.0.0.1"
+
+
+def test_forwarded_for_is_trusted_only_when_configured():
+    headers = {"x-forwarded-for": "6.6.6.6, 1.2.3.4"}
+    assert RateLimiter().client_key(fake_request(headers)) == "ip:10.0.0.1"
+    # With one trusted proxy, the address it appended is the client; the rest is spoofable
+    assert RateLimiter(trusted_proxy_hops=1).client_key(fake_request(headers)) == "ip:1.2.3.4"
+    assert RateLimiter(trusted_proxy_hops=2).client_key(fake_request(headers)) == "ip:6.6.6.6"
+
+
+def test_bucket_count_is_hard_capped():
+    limiter = RateLimiter(rate=1, burst=10, max_clients=5)
+    for i in range(50):
+        limiter.acquire(f"ip:{i}", 10)
+    assert len(limiter.buckets) == 5
+    assert limiter.stats()["overflowed"] == 45
+    # Clients past the cap share the overflow bucket, which is now empty
+    assert limiter.acquire("ip:new", 1) > 0
+
+
+def test_refund_restores_tokens_for_unserved_requests():
+    limiter = RateLimiter(rate=1, burst=100)
+    assert limiter.acquire("ip:a", 100) == 0
+    limiter.refund("ip:a", 100)
+    assert limiter.acquire("ip:a", 100) == 0
+    assert limiter.stats()["refunded"] == 1
+
+
+def test_refund_goes_to_the_overflow_bucket_past_the_cap():
+    limiter = RateLimiter(rate=1, burst=10, max_clients=1)
+    limiter.acquire("ip:a", 1)
+    assert limiter.acquire("ip:b", 10) == 0
+    limiter.refund("ip:b", 10)
+    assert limiter.acquire("ip:c", 10) == 0
+
+
+def test_payload_and_batch_limits_are_counted():
+    limiter = RateLimiter(max_batch_size=3, max_payload_bytes=100)
+    assert limiter.check_payload(100)
+    assert not limiter.check_payload(101)
+    assert limiter.check_batch_size(3)
+    assert not limiter.check_batch_size(4)
+    assert limiter.stats()["throttled"] == {"rate": 0, "batch_size": 1, "payload_bytes": 1}
+
+
+def test_scheduler_serves_interactive_ahead_of_queued_bulk():
+    async def scenario():
+        scheduler = FairScheduler(slots=1, weights={"interactive": 4, "bulk": 1})
+        order = []
+
+        async def job(cls, name, cost=1):
+            async with scheduler.slot(cls, cost):
+                order.append(name)
+                await asyncio.sleep(0)
+
+        async with scheduler.slot("bulk", 10):
+            tasks = [asyncio.create_task(job("bulk", f"bulk-{i}", 10)) for i in range(3)]
+            await asyncio.sleep(0)
+            tasks.append(asyncio.create_task(job("interactive", "interactive")))
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario())[0] == "interactive"
+
+
+def test_scheduler_rejects_past_queue_cap_and_recovers_cancelled_waiters():
+    async def scenario():
+        scheduler = FairScheduler(slots=1, max_queued=2)
+
+        async def wait_for_slot():
+            async with scheduler.slot("bulk"):
+                pass
+
+        async with scheduler.slot("bulk"):
+            waiters = [asyncio.create_task(wait_for_slot()) for _ in range(2)]
+            await asyncio.sleep(0)
+            with pytest.raises(QueueFull):
+                async with scheduler.slot("bulk"):
+                    pass
+            waiters[0].cancel()
+            await asyncio.sleep(0)
+            assert scheduler.queued["bulk"] == 1
+        await asyncio.gather(waiters[1])
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    assert scheduler.free == 1
+    assert not scheduler.waiting
+    assert scheduler.stats()["classes"]["bulk"]["rejected"] == 1
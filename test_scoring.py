@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Unit tests for windowed long text scoring in scoring.py
+"""
+import pytest
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.linear_model import LogisticRegression
+
+from scoring import TextScorer, count_words, text_scorer_from_env
+
+HAM = "meeting report project deadline coffee weekend thanks schedule regards team tomorrow "
+SPAM = "urgent free money click claim prize winner offer discount cash now "
+
+
+@pytest.fixture(scope="module")
+def scorer_parts():
+    texts = [HAM * 3, "thanks for the report see you at the meeting", SPAM * 3, "claim your free prize now"]
+    labels = ["ham", "ham", "spam", "spam"]
+    vectorizer = CountVectorizer().fit(texts)
+    model = LogisticRegression().fit(vectorizer.transform(texts), labels)
+    return vectorizer, model
+
+
+def make_scorer(scorer_parts, **kwargs):
+    settings = {"max_chars": 400, "head_chars": 200, "window_chars": 100, "max_windows": 4}
+    settings.update(kwargs)
+    return TextScorer(*scorer_parts, **settings)
+
+
+def numbered_words(count):
+    return " ".join(f"w{i}" for i in range(count))
+
+
+def test_windows_cover_every_word_when_text_fits(scorer_parts):
+    scorer = make_scorer(scorer_parts)
+    # 200 head chars plus just under 4 * 100 window chars
+    text = numbered_words(130)[:590].rstrip()
+    windows = list(scorer.windows(text))
+    assert " ".join(windows).split() == text.split()
+    assert len(windows[0]) <= 200
+    assert all(len(window) <= 100 for window in windows[1:])
+
+
+def test_sampled_windows_are_bounded_and_never_split_words(scorer_parts):
+    scorer = make_scorer(scorer_parts)
+    text = numbered_words(5000)
+    windows = list(scorer.windows(text))
+    assert len(windows) == 1 + scorer.max_windows
+    assert sum(len(window) for window in windows) <= 200 + 4 * 100
+    for window in windows:
+        start = text.index(window)
+        end = start + len(window)
+        assert start == 0 or text[start - 1] == " "
+        assert end == len(text) or text[end] == " "
+    # Sampling spreads over the whole remainder, not just the part after the head
+    assert int(windows[-1].split()[-1][1:]) > 4000
+
+
+def test_long_text_threshold_is_exclusive(scorer_parts):
+    scorer = make_scorer(scorer_parts)
+    assert not scorer.is_long("x" * 400)
+    assert scorer.is_long("x" * 401)
+
+
+def test_max_aggregation_resists_benign_padding(scorer_parts):
+    # Mostly ham, with spam in the last quarter
+    text = HAM * 30 + SPAM * 12
+    assert make_scorer(scorer_parts, aggregate="max").score(text)[0] == 1
+    assert make_scorer(scorer_parts, aggregate="mean").score(text)[0] == 0
+
+
+@pytest.mark.parametrize("text", [
+    "a" * 10 + " b" * 5,          # word straddles the first slice edge
+    "abcd efgh ijkl mnop qr",     # spaces land exactly on slice edges
+    "  \n\t lead and trail  \t",
+    "\u3000wide\u00a0spaces here",
+])
+def test_sliced_count_matches_split(text):
+    assert count_words(text, slice_chars=5) == len(text.split())
+
+
+def test_long_text_word_count_is_estimated_from_windows(scorer_parts):
+    scorer = make_scorer(scorer_parts)
+    short = numbered_words(50)
+    assert scorer.count_words(short) == 50
+    text = "one two three four five " * 2000
+    assert scorer.count_words(text) == pytest.approx(10000, rel=0.05)
+
+
+@pytest.mark.parametrize("setting, value", [
+    ("LONG_TEXT_MAX_WINDOWS", "0"),
+    ("LONG_TEXT_WINDOW_CHARS", "-1"),
+    ("LONG_TEXT_HEAD_CHARS", "0"),
+    ("LONG_TEXT_AGGREGATE", "median"),
+])
+def test_invalid_settings_are_rejected(scorer_parts, monkeypatch, setting, value):
+    monkeypatch.setenv(setting, value)
+    with pytest.raises(ValueError):
+        text_scorer_from_env(*scorer_parts)
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Unit tests for shadow model comparison statistics in shadow_model.py
+"""
+import pytest
+
+from shadow_model import ShadowEvaluator
+
+
+class FixedScorer:
+    def __init__(self, result):
+        self.result = result
+
+    def score(self, text):
+        return self.result
+
+
+def test_flipped_prediction_is_a_large_spam_probability_delta():
+    # Live says ham at 0.9, shadow says spam at 0.9: P(spam) goes 0.1 -> 0.9
+    shadow = ShadowEvaluator(FixedScorer((1, 0.9)), sample_rate=1.0)
+    shadow._evaluate("text", 0, 0.9)
+    stats = shadow.stats()
+    assert stats["ham_to_spam"] == 1
+    assert stats["average_spam_probability_delta"] == pytest.approx(0.8)
+    assert stats["average_abs_spam_probability_delta"] == pytest.approx(0.8)
+
+
+def test_agreeing_models_report_signed_spam_probability_delta():
+    shadow = ShadowEvaluator(FixedScorer((0, 0.7)), sample_rate=1.0)
+    shadow._evaluate("text", 0, 0.9)
+    assert shadow.stats()["average_spam_probability_delta"] == pytest.approx(0.2)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Traffic generator for load testing the spam detection API or mock_server.py
+Replays a weighted mix of endpoints at a target RPS and reports latency percentiles
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import mock_server
+
+SAMPLE_MESSAGES = [
+    "URGENT! You have won $1000000! Click here now to claim your prize!",
+    "LIMITED TIME OFFER! Buy now and get 90% discount! No credit check required!",
+    "FREE MONEY! Click this link immediately! Act now before it expires!",
+    "Hi there! Hope you're having a great day. Would you like to grab coffee this weekend?",
+    "The meeting has been rescheduled to 3 PM. Please confirm your attendance.",
+    "Could you please send me the report when you have a moment?",
+    "Thanks for helping me with the presentation yesterday.",
+    "ok",
+    "Please remember to submit your timesheet by Friday. " * 20,
+]
+
+DEFAULT_MIX = "predict=70,predict-batch=10,history=10,analytics=10"
+
+
+def parse_mix(mix):
+    """Parse 'endpoint=weight,...' into parallel lists of endpoints and weights"""
+    endpoints, weights = [], []
+    for part in mix.split(","):
+        name, weight = part.split("=")
+        endpoints.append(name.strip())
+        weights.append(float(weight))
+    return endpoints, weights
+
+
+def build_request(base_url, endpoint, max_batch):
+    """Return a urllib Request for one synthetic call to `endpoint`"""
+    if endpoint == "predict":
+        body = {"text": random.choice(SAMPLE_MESSAGES)}
+    elif endpoint == "predict-batch":
+        body = {"texts": random.choices(SAMPLE_MESSAGES, k=random.randint(1, max_batch))}
+    elif endpoint == "history":
+        return urllib.request.Request(f"{base_url}/history?limit=10")
+    elif endpoint == "analytics":
+        return urllib.request.Request(f"{base_url}/analytics")
+    else:
+        raise ValueError(f"Unknown endpoint in traffic mix: {endpoint}")
+    return urllib.request.Request(
+        f"{base_url}/{endpoint}",
+        data=json.dumps(body).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+
+
+class LatencyRecorder:
+    """Thread-safe per-endpoint latencies of successful requests, plus error counts
+
+    Failures (injected 500s, connection errors) are counted but kept out of the
+    percentiles, since a fast error says nothing about service time.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies_ms = {}
+        self.errors = {}
+
+    def record(self, endpoint, latency_ms, ok):
+        with self.lock:
+            if ok:
+                self.latencies_ms.setdefault(endpoint, []).append(latency_ms)
+            else:
+                self.latencies_ms.setdefault(endpoint, [])
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def report(self, elapsed):
+        total = sum(len(v) for v in self.latencies_ms.values()) + sum(self.errors.values())
+        print(f"\n📊 {total} requests in {elapsed:.1f}s ({total / elapsed:.1f} RPS achieved)")
+        print(f"{'endpoint':<15}{'ok':>8}{'errors':>8}{'p50':>9}{'p90':>9}{'p99':>9}{'p99.9':>9}{'max':>9}")
+        rows = sorted(self.latencies_ms.items())
+        all_latencies = [x for _, values in rows for x in values]
+        for name, values in rows + [("all", all_latencies)]:
+            errors = self.errors.get(name, 0) if name != "all" else sum(self.errors.values())
+            if not values:
+                if errors:
+                    print(f"{name:<15}{0:>8}{errors:>8}")
+                continue
+            p50, p90, p99, p999 = np.percentile(values, [50, 90, 99, 99.9])
+            print(f"{name:<15}{len(values):>8}{errors:>8}"
+                  f"{p50:>9.1f}{p90:>9.1f}{p99:>9.1f}{p999:>9.1f}{max(values):>9.1f}")
+        print("(latencies in ms for successful requests, measured from each request's scheduled send time)")
+
+
+def send(request, endpoint, scheduled, recorder):
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            response.read()
+            ok = 200 <= response.status < 300
+    except (urllib.error.URLError, OSError):
+        ok = False
+    # Measure from the scheduled time so client-side queueing is not hidden
+    recorder.record(endpoint, (time.perf_counter() - scheduled) * 1000, ok)
+
+
+def run(base_url, rps, seconds, mix, max_batch, concurrency, poisson=True):
+    """Open-loop load: requests are sent on schedule whether or not earlier ones finished"""
+    endpoints, weights = parse_mix(mix)
+    recorder = LatencyRecorder()
+    start = time.perf_counter()
+    next_send = start
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while next_send - start < seconds:
+            now = time.perf_counter()
+            if next_send > now:
+                time.sleep(next_send - now)
+            endpoint = random.choices(endpoints, weights)[0]
+            request = build_request(base_url, endpoint, max_batch)
+            pool.submit(send, request, endpoint, next_send, recorder)
+            next_send += random.expovariate(rps) if poisson else 1.0 / rps
+    recorder.report(time.perf_counter() - start)
+    return recorder
+
+
+def start_mock(port, latency_ms, latency_jitter_ms, error_rate):
+    """Run mock_server.py in a background thread"""
+    mock_server.config.update(
+        latency_ms=latency_ms,
+        latency_jitter_ms=latency_jitter_ms,
+        error_rate=error_rate,
+        quiet=True,
+    )
+    server = mock_server.create_server(port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://localhost:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", help="Server to test (default: start mock_server.py locally)")
+    parser.add_argument("--port", type=int, default=8010, help="Port for the local mock server")
+    parser.add_argument("--rps", type=float, default=100, help="Target requests per second")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Endpoint weights, e.g. " + DEFAULT_MIX)
+    parser.add_argument("--max-batch", type=int, default=20, help="Largest /predict-batch size")
+    parser.add_argument("--concurrency", type=int, default=64, help="Max requests in flight")
+    parser.add_argument("--constant", action="store_true", help="Evenly spaced instead of Poisson arrivals")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Mock server synthetic latency")
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Mock server injected error rate")
+    args = parser.parse_args()
+
+    base_url = args.url or start_mock(args.port, args.latency_ms, args.latency_jitter_ms, args.error_rate)
+    print(f"🎯 {args.rps} RPS for {args.seconds}s against {base_url}")
+    print(f"🔀 Traffic mix: {args.mix}")
+    run(base_url, args.rps, args.seconds, args.mix, args.max_batch, args.concurrency,
+        poisson=not args.constant)
+
+
+if __name__ == "__main__":
+    main()